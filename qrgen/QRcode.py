@@ -1,8 +1,9 @@
 import logging
+import struct
+import zlib
 
 import numpy as np
 from PIL import Image
-import matplotlib.pyplot as plt
 
 from .QRmatrix import QRmatrix
 from .spec import QRspec, get_spec
@@ -12,6 +13,9 @@ from .error_correction import compute_EC_blocks
 
 logger = logging.getLogger(__name__)
 
+# Gray levels of the light (False) and dark (True) modules in the image
+_GRAY_LEVELS = np.array([255, 0], dtype=np.uint8)
+
 
 class QRcode:
     """Class for generating QR codes.
@@ -55,36 +59,36 @@ class QRcode:
                 f" string ('L', 'M', 'Q', or 'H') expected for error correction level, instead got '{error_correction_level}'"
             )
 
-        logging.info("Input data types valid. Initializing QRcode object.")
+        logger.info("Input data types valid. Initializing QRcode object.")
         self.msg = str(msg)
         try:
             self._spec: QRspec = get_spec(
                 len(msg), version, error_correction_level, encoding
             )
         except ValueError as err:
-            logging.exception(err)
+            logger.exception(err)
             raise
 
     def generate(self) -> None:
         """Generates the QR code based on the provided message and specifications."""
 
-        logging.info(f"Encoding the data in {self._spec.encoding.name.lower()} mode.")
+        logger.info("Encoding the data in %s mode.", self._spec.encoding.name.lower())
         data = encode(spec=self._spec, msg=self.msg)
 
-        logging.info("Adding error correction bits.")
+        logger.info("Adding error correction bits.")
         data_blocks = split_data_in_blocks(self._spec, data)
         EC_blocks = compute_EC_blocks(self._spec.EC_bytes_per_block, data_blocks)
         all_blocks = interlace_blocks(self._spec, data_blocks, EC_blocks)
         bitstring = bits_from_blocks(all_blocks)
-        logging.info("Encoded data generated successfully.")
+        logger.info("Encoded data generated successfully.")
 
-        logging.info("Adding the data to the QR code matrix.")
+        logger.info("Adding the data to the QR code matrix.")
         self.qr_obj = QRmatrix(self._spec)
         self.qr_obj.add_data(bitstring)
         self.qr_obj.pattern_mask()
         self.qrmat = self.qr_obj.mat
 
-        logging.info("Generating image from the QR-code matrix.")
+        logger.info("Generating image from the QR-code matrix.")
         self._create_image()
 
     def __str__(self):
@@ -95,16 +99,23 @@ class QRcode:
     def _create_image(self) -> None:
         """Creates a PIL Image object from the QR code matrix."""
         padding = 6
-        self.tmp_img = Image.fromarray(np.uint8(~self.qrmat) * 255)
-        width, height = self.tmp_img.size
+        size = self.qrmat.shape[0]
 
-        # The mode 'L' is for a 8-bit grayscale image
-        logging.info(f"Padding image with {padding} modules on each side.")
+        # The padding (quiet zone) is light, so the padded image array is allocated once and
+        # filled with white, and the QR code matrix is then written into its interior
+        logger.info("Padding image with %d modules on each side.", padding)
+        img_arr = np.full((size + 2 * padding, size + 2 * padding), 255, dtype=np.uint8)
+        interior = img_arr[padding : padding + size, padding : padding + size]
 
-        self.qrimg = Image.new(
-            mode="L", size=(width + 2 * padding, height + 2 * padding), color=255
-        )
-        self.qrimg.paste(self.tmp_img, (padding, padding))
+        # Light modules are white (255) and dark modules are black (0), which is looked up
+        # from the bytes (0 or 1) of the boolean matrix directly into the interior
+        np.take(_GRAY_LEVELS, self.qrmat.view(np.uint8), out=interior)
+
+        # A 2D uint8 array gives an image with mode 'L' (8-bit grayscale)
+        self.qrimg = Image.fromarray(img_arr)
+
+        # Scaled up copies of the image (used by display and export), keyed by the scale factor
+        self._scaled_images: dict[int, Image] = {}
 
     def get_image(self) -> Image:
         """Returns the QR code as a PIL Image object."""
@@ -113,8 +124,30 @@ class QRcode:
 
         return self.qrimg
 
-    def display(self):
-        """Displays the QR code using matplotlib."""
+    def _scaled_image(self, scale: int) -> Image:
+        """Returns the QR code image scaled up by an integer factor (cached for each factor)."""
+        _check_scale(scale)
+        if not hasattr(self, "qrimg"):
+            self.generate()
+
+        if scale not in self._scaled_images:
+            # Each pixel is replaced by a scale x scale block of the same value
+            # (repeating the rows and the columns only copies bytes, unlike np.kron)
+            img_arr = np.asarray(self.qrimg)
+            scaled_arr = np.repeat(np.repeat(img_arr, scale, axis=0), scale, axis=1)
+            self._scaled_images[scale] = Image.fromarray(scaled_arr)
+
+        return self._scaled_images[scale]
+
+    def display(self, use_mpl: bool = False, scale: int = 10) -> None:
+        """Displays the QR code in the default image viewer (or using matplotlib if use_mpl is True)."""
+        if not use_mpl:
+            self._scaled_image(scale).show()
+            return
+
+        # Matplotlib is only imported when requested, since the import itself is slow
+        import matplotlib.pyplot as plt
+
         if not hasattr(self, "qrimg"):
             self.generate()
 
@@ -126,13 +159,20 @@ class QRcode:
 
     def export(self, filename: str, scale: int = 20) -> None:
         """Exports the QR code to an image file."""
-        if not hasattr(self, "qrimg"):
-            self.generate()
+        _check_scale(scale)
 
-        width, height = self.qrimg.size
-        resized_img = self.qrimg.resize(
-            (width * scale, height * scale), resample=Image.NEAREST
-        )
+        # PNG files are written directly as 1-bit grayscale images, without creating
+        # the scaled up image (see _save_png)
+        if filename.lower().endswith(".png"):
+            if not hasattr(self, "qrimg"):
+                self.generate()
+            try:
+                _save_png(filename, np.asarray(self.qrimg), scale)
+            except OSError:
+                raise Exception("Error saving the QR code as", filename)
+            return
+
+        resized_img = self._scaled_image(scale)
 
         try:
             resized_img.save(filename)
@@ -166,3 +206,39 @@ class QRcode:
         stats["pattern_mask_number"] = self.qr_obj.masknum
 
         return stats
+
+
+def _check_scale(scale: int) -> None:
+    """Raises a ValueError unless the scale factor of an image is a positive integer."""
+    if not isinstance(scale, int) or scale < 1:
+        raise ValueError(f" scale must be a positive integer, instead got '{scale}'")
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    """Returns a PNG chunk (length, type, data, and CRC of the type and data)."""
+    crc = zlib.crc32(chunk_type + data)
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+
+def _save_png(filename: str, img_arr: np.ndarray, scale: int) -> None:
+    """Saves a black and white image array, scaled up by an integer factor, as a 1-bit PNG.
+
+    Each pixel is stored as a single bit (1 for white), so the scaled up rows are packed
+    into bytes and only the packed rows are repeated, which is 8 times smaller than the
+    scaled up 8-bit image. The rows are not filtered (filter type 0) before compression.
+    """
+    height, width = img_arr.shape
+
+    packed_rows = np.packbits(np.repeat(img_arr > 127, scale, axis=1), axis=1)
+    filter_bytes = np.zeros((height, 1), dtype=np.uint8)
+    scanlines = np.repeat(np.hstack((filter_bytes, packed_rows)), scale, axis=0)
+
+    # Width, height, bit depth 1, color type 0 (grayscale), and the default compression,
+    # filter, and (no) interlace methods
+    header = struct.pack(">IIBBBBB", width * scale, height * scale, 1, 0, 0, 0, 0)
+
+    with open(filename, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(_png_chunk(b"IHDR", header))
+        file.write(_png_chunk(b"IDAT", zlib.compress(scanlines.tobytes())))
+        file.write(_png_chunk(b"IEND", b""))
@@ -1,7 +1,43 @@
+from functools import lru_cache
+
 import numpy as np
 
 from .spec import QRspec, CORNER_SIZE, ALIGNMENT_BLOCK_SIZE
-from .pattern_mask import eval_qrmat, gen_pmasks
+from .pattern_mask import eval_bitboards, gen_pmasks, pack_bitboard
+
+# The corner block
+_CORNER_BLOCK = np.zeros((CORNER_SIZE, CORNER_SIZE), dtype=bool)
+_CORNER_BLOCK[2 : CORNER_SIZE - 2, 2 : CORNER_SIZE - 2] = True  # Central square
+_CORNER_BLOCK[0:CORNER_SIZE, 0] = True  # Left vertical line
+_CORNER_BLOCK[0:CORNER_SIZE, CORNER_SIZE - 1] = True  # Right vertical line
+_CORNER_BLOCK[0, 1 : CORNER_SIZE - 1] = True  # Top horizontal line
+_CORNER_BLOCK[CORNER_SIZE - 1, 1 : CORNER_SIZE - 1] = True  # Bottom horizontal line
+_CORNER_BLOCK.setflags(write=False)
+
+# The alignment block
+_ALIGNMENT_BLOCK = np.zeros((ALIGNMENT_BLOCK_SIZE, ALIGNMENT_BLOCK_SIZE), dtype=bool)
+_ALIGNMENT_BLOCK[2:-2, 2:-2] = True  # Central square
+_ALIGNMENT_BLOCK[:, 0] = True  # Left vertical line
+_ALIGNMENT_BLOCK[:, -1] = True  # Right vertical line
+_ALIGNMENT_BLOCK[0, :] = True  # Top horizontal line
+_ALIGNMENT_BLOCK[-1, :] = True  # Bottom horizontal line
+_ALIGNMENT_BLOCK.setflags(write=False)
+
+# Pattern masks restricted to the encoding region, for each version
+_COMBINED_MASKS: dict[int, np.ndarray] = {}
+
+# The best pattern mask of the last QR-code matrix of each size
+_PREV_BEST_MASK: dict[int, int] = {}
+
+# The same masks packed into bitboards (see pack_bitboard), and their transposes, for each version
+_PACKED_MASKS: dict[int, tuple[list[int], list[int]]] = {}
+
+# The QR-code matrix with the functional modules (except for the format strip) and the mask
+# of the functional regions, for each version
+_TEMPLATES: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+
+# Flat indices of the data modules in the order in which they are filled, for each version
+_DATA_POSITIONS: dict[int, np.ndarray] = {}
 
 
 class QRmatrix:
@@ -19,7 +55,46 @@ class QRmatrix:
 
         # Compute the size of the QR-code matrix as defined in the specifications
         self.size = 4 * self._spec.version + 17
-        self.num_func_bits = 0
+        self.num_func_bits = _num_func_bits(self._spec.version)
+
+        # The functional modules and the mask of the functional regions depend only on the
+        # version, so they are placed once for each version and then copied from a template
+        template = _TEMPLATES.get(self._spec.version)
+        if template is None:
+            self._add_functional_modules()
+            self.mat.setflags(write=False)
+            self.func_mask.setflags(write=False)
+            template = (self.mat, self.func_mask)
+            _TEMPLATES[self._spec.version] = template
+
+        # The mask of the functional regions is never modified, so it is shared (read-only)
+        self.mat = template[0].copy()
+        self.func_mask = template[1]
+
+        # Generate the set of pattern masks for the given size
+        self.pmasks = gen_pmasks(self.size)
+
+        # Restrict the pattern masks to the encoding region, since the functional modules
+        # are never masked. This does not change between the different mask attempts, and
+        # since the encoding region depends only on the version, it is shared between all
+        # QR-code matrices of the same version.
+        self.combined_masks = _COMBINED_MASKS.get(self._spec.version)
+        if self.combined_masks is None:
+            self.combined_masks = np.bitwise_and(self.func_mask, self.pmasks)
+            self.combined_masks.setflags(write=False)
+            _COMBINED_MASKS[self._spec.version] = self.combined_masks
+            _PACKED_MASKS[self._spec.version] = (
+                [pack_bitboard(mask) for mask in self.combined_masks],
+                [pack_bitboard(mask.T) for mask in self.combined_masks],
+            )
+        self.packed_masks, self.packed_masks_T = _PACKED_MASKS[self._spec.version]
+
+    # PLACMENT OF FUNCTIONAL MODULES
+    # =================================================================
+
+    def _add_functional_modules(self) -> None:
+        """Initialize the QR-code matrix and the mask of the functional regions, and place
+        all the functional modules except for the format strip."""
 
         # Initialize the QR-code matrix and the mask matrix for the functional regions
         # These are defined as numpy matrices of booleans (instead of lists of lists)
@@ -28,40 +103,21 @@ class QRmatrix:
         self.func_mask = np.full((self.size, self.size), True, dtype=bool)
         # We will set fmask[i,j] == False if the module (i,j) is a functional module
 
-        self.num_func_bits += self._add_corner_and_timing()
-        self.num_func_bits += self._add_alignment_blocks()
+        self._add_corner_and_timing()
+        self._add_alignment_blocks()
         if self._spec.version >= 7:
             ver_arr = np.array(self._spec.version_to_bool_array())
-            self.num_func_bits += self._add_version_info(ver_arr)
+            self._add_version_info(ver_arr)
 
         # The format strip is added at the very end (since it contains the mask number)
-        # Thus remove the number of bits added by the format strip "by hand"
-        self.num_func_bits += 2 * (2 * CORNER_SIZE + 1)  # Format strip
 
-        # Generate the set of pattern masks for the given size
-        self.pmasks = gen_pmasks(self.size)
-
-    # PLACMENT OF FUNCTIONAL MODULES
-    # =================================================================
-
-    def _add_corner_and_timing(self) -> int:
-        """Place the corner blocks and the timing strips in the QR-code matrix.
-
-        Returns the total number of modules occupied by the corner and timing blocks.
-        """
-
-        # Initialize the corner block
-        cblock = np.zeros((CORNER_SIZE, CORNER_SIZE), dtype=bool)
-        cblock[2 : CORNER_SIZE - 2, 2 : CORNER_SIZE - 2] = True  # Central square
-        cblock[0:CORNER_SIZE, 0] = True  # Left vertical line
-        cblock[0:CORNER_SIZE, CORNER_SIZE - 1] = True  # Right vertical line
-        cblock[0, 1 : CORNER_SIZE - 1] = True  # Top horizontal line
-        cblock[CORNER_SIZE - 1, 1 : CORNER_SIZE - 1] = True  # Bottom horizontal line
+    def _add_corner_and_timing(self) -> None:
+        """Place the corner blocks and the timing strips in the QR-code matrix."""
 
         # Assign to the three corners of the QR-code matrix (excluding bottom-right corner)
-        self.mat[:CORNER_SIZE, :CORNER_SIZE] = cblock  # Top left
-        self.mat[:CORNER_SIZE, -CORNER_SIZE:] = cblock  # Top right
-        self.mat[-CORNER_SIZE:, :CORNER_SIZE] = cblock  # Bottom left
+        self.mat[:CORNER_SIZE, :CORNER_SIZE] = _CORNER_BLOCK  # Top left
+        self.mat[:CORNER_SIZE, -CORNER_SIZE:] = _CORNER_BLOCK  # Top right
+        self.mat[-CORNER_SIZE:, :CORNER_SIZE] = _CORNER_BLOCK  # Bottom left
 
         # Place the "dark module"
         self.mat[-CORNER_SIZE - 1, CORNER_SIZE + 1] = True
@@ -84,105 +140,40 @@ class QRmatrix:
         self.func_mask[CORNER_SIZE - 1, CORNER_SIZE:-(CORNER_SIZE)] = False
         self.func_mask[CORNER_SIZE:-(CORNER_SIZE), CORNER_SIZE - 1] = False
 
-        num_corner_bits = 3 * (CORNER_SIZE + 1) ** 2 + 1  # Including the dark module
-        num_timing_bits = 2 * (self.size - 2 * (CORNER_SIZE + 1))  # Timing strips
-
-        return num_corner_bits + num_timing_bits
-
-    def _compute_alignment_block_centers(self, num_per_side: int) -> np.ndarray:
-        """Compute the centers of the alignment blocks in the QR-code matrix."""
-
-        # Distance between the centers of the alignment patterns (counted from the right)
-        dist = np.ceil(
-            0.5
-            * (int(np.ceil((4 * (self._spec.version + 1) / (num_per_side - 1) - 0.5))))
-        )
-
-        # Compute the allowed (x or y) coordinates for the centers of the alignment patterns
-        coord_list = [0] * num_per_side
-        coord_list[0] = CORNER_SIZE - 1
-        for i in range(num_per_side - 1):
-            coord_list[-i - 1] = self.size - CORNER_SIZE - 2 * round(i * dist)
-
-        # Exclude three alignment blocks that overlap with the corner patterns
-        num_alignment_blocks = num_per_side**2 - 3
-        centers = np.zeros((num_alignment_blocks, 2), dtype=int)
-        index = 0
-
-        # Compute the centers of the alignment patterns (excluding the top row and left column)
-        for i in range(num_per_side - 1):
-            for j in range(num_per_side - 1):
-                centers[index] = [coord_list[-i - 1], coord_list[-j - 1]]
-                index += 1
-
-        # Compute the centers of the alignment patterns for top row and left column
-        # For both of these, the first and last elements overlap with the corner and must be excluded
-        for i in range(1, num_per_side - 1):
-            centers[index] = [coord_list[i], coord_list[0]]
-            centers[index + 1] = [coord_list[0], coord_list[i]]
-            index += 2
-
-        return centers
-
-    def _add_alignment_blocks(self) -> int:
-        """Place the alignment blocks in the QR-code matrix.
-
-        Returns the total number of modules occupied by the corner and timing blocks.
-        """
+    def _add_alignment_blocks(self) -> None:
+        """Place the alignment blocks in the QR-code matrix."""
         if self._spec.version < 2:
-            return 0  # No alignment patterns for versions < 2
+            return  # No alignment patterns for versions < 2
 
-        # Number of alignment patterns per side
-        num_blocks_per_side = 2 + (self._spec.version // 7)
-        alignment_pattern_centers = self._compute_alignment_block_centers(
-            num_blocks_per_side
-        )
-
-        #  Define the alignment block
-        ablock = np.zeros((ALIGNMENT_BLOCK_SIZE, ALIGNMENT_BLOCK_SIZE), dtype=bool)
-        ablock[2:-2, 2:-2] = True  # Central square
-        ablock[:, 0] = True  # Left vertical line
-        ablock[:, -1] = True  # Right vertical line
-        ablock[0, :] = True  # Top horizontal line
-        ablock[-1, :] = True  # Bottom horizontal line
+        alignment_pattern_centers = _alignment_block_centers(self._spec.version)
 
         # Assign the alignment blocks to the QR-code matrix and update the mask
-        for x, y in alignment_pattern_centers:
-            self.mat[x - 2 : x + 3, y - 2 : y + 3] = ablock
-            self.func_mask[x - 2 : x + 3, y - 2 : y + 3] = False
-
-        # Compute the number of modules occupied by the alignment patterns
-        num_alignment_bits = len(alignment_pattern_centers) * ALIGNMENT_BLOCK_SIZE**2
-        # Remove the bits that overlap with the timing modules to avoid double counting
-        num_alignment_bits -= 2 * (num_blocks_per_side - 2) * ALIGNMENT_BLOCK_SIZE
-        return num_alignment_bits
+        # All the blocks are assigned at once, by indexing with the (broadcast) row and column
+        # indices of the modules of each block, of shape (number of blocks, 5, 5)
+        offsets = np.arange(ALIGNMENT_BLOCK_SIZE) - ALIGNMENT_BLOCK_SIZE // 2
+        centers = alignment_pattern_centers[:, :, np.newaxis, np.newaxis]
+        rows = centers[:, 0] + offsets[:, np.newaxis]
+        cols = centers[:, 1] + offsets
+        self.mat[rows, cols] = _ALIGNMENT_BLOCK
+        self.func_mask[rows, cols] = False
+
+    def _add_version_info(self, version_arr: np.ndarray) -> None:
+        """Place the version information in the QR-code matrix."""
+        # The version bits fill a 6x3 block (starting from the last bit) row by row
+        version_block = version_arr[::-1].reshape(CORNER_SIZE - 1, 3)
 
-    def _add_version_info(self, version_arr: np.ndarray) -> int:
-        """Place the version information in the QR-code matrix.
-
-        Returns the total number of modules occupied by the version blocks
-        """
         # Top-right corner
-        self.mat[: CORNER_SIZE - 1, -CORNER_SIZE - 2] = version_arr[-3::-3]
-        self.mat[: CORNER_SIZE - 1, -CORNER_SIZE - 3] = version_arr[-2::-3]
-        self.mat[: CORNER_SIZE - 1, -CORNER_SIZE - 4] = version_arr[-1::-3]
+        self.mat[: CORNER_SIZE - 1, -CORNER_SIZE - 4 : -CORNER_SIZE - 1] = version_block
 
-        # Bottom-left corner
-        self.mat[-CORNER_SIZE - 2, : CORNER_SIZE - 1] = version_arr[-3::-3]
-        self.mat[-CORNER_SIZE - 3, : CORNER_SIZE - 1] = version_arr[-2::-3]
-        self.mat[-CORNER_SIZE - 4, : CORNER_SIZE - 1] = version_arr[-1::-3]
+        # Bottom-left corner (transposed)
+        self.mat[-CORNER_SIZE - 4 : -CORNER_SIZE - 1, : CORNER_SIZE - 1] = version_block.T
 
         # Exclude the version blocks from the functional region mask
         self.func_mask[: CORNER_SIZE - 1, -CORNER_SIZE - 4 : -CORNER_SIZE - 1] = False
         self.func_mask[-CORNER_SIZE - 4 : -CORNER_SIZE - 1, : CORNER_SIZE - 1] = False
 
-        return 2 * 3 * (CORNER_SIZE - 1)
-
-    def _add_format_info(self, fmt_arr: np.ndarray) -> int:
-        """Place the format information in the QR-code matrix.
-
-        Returns the total number of modules occupied by the version blocks
-        """
+    def _add_format_info(self, fmt_arr: np.ndarray) -> None:
+        """Place the format information in the QR-code matrix."""
         # Top-left corner
         self.mat[CORNER_SIZE + 1, : CORNER_SIZE - 1] = fmt_arr[: CORNER_SIZE - 1]
         self.mat[CORNER_SIZE + 1, CORNER_SIZE] = fmt_arr[CORNER_SIZE - 1]
@@ -194,8 +185,6 @@ class QRmatrix:
         self.mat[-1 : -(CORNER_SIZE + 1) : -1, CORNER_SIZE + 1] = fmt_arr[:CORNER_SIZE]
         self.mat[CORNER_SIZE + 1, -(CORNER_SIZE + 1) :] = fmt_arr[CORNER_SIZE:]
 
-        return 2 * (2 * CORNER_SIZE + 1)
-
     # PLACMENT OF THE DATA IN THE QR-CODE MATRIX
     # =================================================================
 
@@ -205,54 +194,16 @@ class QRmatrix:
 
         The assignment of data modules follows by moving a "cursor" in a ziazag fashion
         as specified in the QR-code standard, while avoiding the functional regions.
-        The cursor starts at the bottom-right corner and moves upwards, alternating between
-        horizontal and diagonal movements, whose directions are stored in vectors vx and vy.
-        Once the cursor reaches the top edge, it shifts to the left and starts moving downwards.
-        This general up/down trend is indicated by vdir (+1 for down, -1 for up)
+        See _data_positions for details. The order of the data modules depends only on the
+        version, so it is computed once for each version.
         """
+        positions = _DATA_POSITIONS.get(self._spec.version)
+        if positions is None:
+            positions = _data_positions(self.func_mask)
+            positions.setflags(write=False)
+            _DATA_POSITIONS[self._spec.version] = positions
 
-        # Define the step vectors for horizontal and vertical movements
-        # Diagonal movement is obtained by combining the horizontal and vertical movements
-        STEP_LEFT = np.array([0, -1])
-        STEP_RIGHT = np.array([0, 1])
-        STEP_UP = np.array([-1, 0])
-
-        # Flags for the direction of movement
-        vdir = 1  # 1 for up, -1 for down
-        hflag = True  # True for horizontal, False for diagonal movement
-
-        # Starting position (at the bottom-right corner of the matrix)
-        # The position is given as [row, column], equivalent to [y, x] in Cartesian coordinates
-        # The top-left corner is at pos = [0,0]
-        pos = np.array([self.size - 1, self.size - 1])
-
-        datalen = len(data)
-        index = 0  # Indexes the bit in the data array to be placed
-        while index < datalen:
-            # If the current position is in the encoding region, then add the next bit
-            if self.func_mask[pos[0], pos[1]]:
-                self.mat[pos[0], pos[1]] = data[index]
-                index += 1
-
-            # If the current position is in the timing strip
-            if pos[1] == CORNER_SIZE - 1:
-                pos = pos + STEP_LEFT
-
-            # Compute the next position (horizontal or diagonal) based on hflag
-            # and flip hflag to alternate between the two directions of motion
-            if hflag:
-                nextpos = pos + STEP_LEFT
-            else:
-                nextpos = pos + STEP_RIGHT + vdir * STEP_UP
-            hflag = not hflag
-
-            # If the computed next position is outside the QR-code matrix, then change direction
-            if nextpos[0] < 0 or nextpos[0] >= self.size:
-                pos = pos + STEP_LEFT
-                vdir *= -1
-                hflag = True
-            else:
-                pos = nextpos
+        self.mat.flat[positions[: len(data)]] = data
 
     # PATTERN MASKING
     # =================================================================
@@ -263,32 +214,170 @@ class QRmatrix:
         # Initialize the max_penalty to something large
         max_penalty = 100000
         best_mask_num = -1
-        best_qrmat = self.mat.copy()
+
+        # The scoring stops as soon as a mask cannot beat the best one so far, so the mask that
+        # was the best for the previous QR code of the same version is tried first
+        prev_best = _PREV_BEST_MASK.get(self.size, 0)
+        mask_order = [prev_best] + [num for num in range(0, 8) if num != prev_best]
 
         # Iterate over all possible mask patterns
-        for mask_num in range(0, 8):
+        # The masks are applied to the QR code matrix packed into bitboards (one for the rows
+        # and one for the columns), so that applying a mask is a single XOR of two integers
+        for mask_num in mask_order:
             # Add the format information array for the current mask number
-            format_arr = np.array(self._spec.format_to_bool_array(mask_num))
+            format_arr = self._spec.format_to_bool_array(mask_num)
             self._add_format_info(format_arr)
 
-            # Copy the current QR code matrix
-            cur_qrmat = self.mat.copy()
-
             # Apply the pattern mask to the current QR code matrix
-            combined_mask = np.logical_and(self.func_mask, self.pmasks[mask_num])
-            np.logical_xor(cur_qrmat, combined_mask, out=cur_qrmat)
+            bitboard = pack_bitboard(self.mat) ^ self.packed_masks[mask_num]
+            bitboard_T = pack_bitboard(self.mat.T) ^ self.packed_masks_T[mask_num]
 
-            # Score the current QR code matrix
-            penalty = eval_qrmat(cur_qrmat, self.size)
+            # Score the current QR code matrix (stopping early if it cannot beat the best score)
+            # In case of a tie, the mask with the lower number wins (as if the masks were tried
+            # in order), so a lower numbered mask is scored exactly up to a tie with the best one
+            cutoff = max_penalty + 1 if mask_num < best_mask_num else max_penalty
+            penalty = eval_bitboards(bitboard, bitboard_T, self.size, cutoff)
 
-            # Update the best QR matrix and score if the current score is better
-            if penalty < max_penalty:
+            # Update the best mask number and score if the current score is better
+            if penalty < cutoff:
                 max_penalty = penalty
                 best_mask_num = mask_num
-                best_qrmat = cur_qrmat
 
-        # Set the QR code matrix to the best one found
+        _PREV_BEST_MASK[self.size] = best_mask_num
+
+        # Apply the best mask (and the corresponding format information) to the QR code matrix
+        format_arr = self._spec.format_to_bool_array(best_mask_num)
+        self._add_format_info(format_arr)
+        # Bitwise XOR on the bytes of the bool arrays (which hold 0 or 1) is the same as the
+        # logical XOR, but takes the faster integer loop
+        np.bitwise_xor(
+            self.mat.view(np.uint8),
+            self.combined_masks[best_mask_num].view(np.uint8),
+            out=self.mat.view(np.uint8),
+        )
         self.masknum = best_mask_num
-        self.mat = best_qrmat
 
         return
+
+
+@lru_cache(maxsize=None)
+def _num_func_bits(version: int) -> int:
+    """Returns the number of functional modules in the QR-code matrix of a given version."""
+    size = 4 * version + 17
+
+    # Corner blocks (with their quiet regions and the "dark module") and timing strips
+    num_corner_bits = 3 * (CORNER_SIZE + 1) ** 2 + 1
+    num_timing_bits = 2 * (size - 2 * (CORNER_SIZE + 1))
+
+    # Alignment blocks (if any), without the modules that overlap with the timing strips
+    num_alignment_bits = 0
+    if version >= 2:
+        num_per_side = 2 + (version // 7)
+        num_alignment_bits = (num_per_side**2 - 3) * ALIGNMENT_BLOCK_SIZE**2
+        num_alignment_bits -= 2 * (num_per_side - 2) * ALIGNMENT_BLOCK_SIZE
+
+    # Version blocks (for versions 7 and above) and format strips
+    num_version_bits = 2 * 3 * (CORNER_SIZE - 1) if version >= 7 else 0
+    num_format_bits = 2 * (2 * CORNER_SIZE + 1)
+
+    return (
+        num_corner_bits
+        + num_timing_bits
+        + num_alignment_bits
+        + num_version_bits
+        + num_format_bits
+    )
+
+
+@lru_cache(maxsize=None)
+def _alignment_block_centers(version: int) -> np.ndarray:
+    """Compute the centers of the alignment blocks in the QR-code matrix of a given version.
+
+    The centers depend only on the version, so they are computed once for each version and
+    returned as a read-only array.
+    """
+    size = 4 * version + 17
+    num_per_side = 2 + (version // 7)
+
+    # Distance between the centers of the alignment patterns (counted from the right)
+    dist = np.ceil(0.5 * (int(np.ceil((4 * (version + 1) / (num_per_side - 1) - 0.5)))))
+
+    # Compute the allowed (x or y) coordinates for the centers of the alignment patterns
+    coord_list = [0] * num_per_side
+    coord_list[0] = CORNER_SIZE - 1
+    for i in range(num_per_side - 1):
+        coord_list[-i - 1] = size - CORNER_SIZE - 2 * round(i * dist)
+
+    # Exclude three alignment blocks that overlap with the corner patterns
+    num_alignment_blocks = num_per_side**2 - 3
+    centers = np.zeros((num_alignment_blocks, 2), dtype=int)
+    index = 0
+
+    # Compute the centers of the alignment patterns (excluding the top row and left column)
+    for i in range(num_per_side - 1):
+        for j in range(num_per_side - 1):
+            centers[index] = [coord_list[-i - 1], coord_list[-j - 1]]
+            index += 1
+
+    # Compute the centers of the alignment patterns for top row and left column
+    # For both of these, the first and last elements overlap with the corner and must be excluded
+    for i in range(1, num_per_side - 1):
+        centers[index] = [coord_list[i], coord_list[0]]
+        centers[index + 1] = [coord_list[0], coord_list[i]]
+        index += 2
+
+    centers.setflags(write=False)
+    return centers
+
+
+def _data_positions(func_mask: np.ndarray) -> np.ndarray:
+    """
+    Returns the flat indices of the modules in the encoding region (where func_mask is True),
+    in the order in which the data bits are placed.
+
+    The cursor starts at the bottom-right corner and moves upwards, alternating between
+    horizontal and diagonal movements. Once the cursor reaches the top edge, it shifts to
+    the left and starts moving downwards. This general up/down trend is indicated by vdir
+    (+1 for up, -1 for down). The position of the cursor is kept in two plain integers
+    (row and column), so that no arrays are created while moving it.
+    """
+    size = func_mask.shape[0]
+    is_free = func_mask.tolist()
+    num_free = int(np.count_nonzero(func_mask))
+    positions: list[int] = []
+
+    # Flags for the direction of movement
+    vdir = 1  # 1 for up, -1 for down
+    hflag = True  # True for horizontal, False for diagonal movement
+
+    # Starting position (at the bottom-right corner of the matrix)
+    # The top-left corner is at row = col = 0
+    row = size - 1
+    col = size - 1
+
+    while len(positions) < num_free:
+        # If the current position is in the encoding region, then it holds the next bit
+        if is_free[row][col]:
+            positions.append(row * size + col)
+
+        # If the current position is in the timing strip
+        if col == CORNER_SIZE - 1:
+            col -= 1
+
+        # Compute the next position (horizontal or diagonal) based on hflag
+        # and flip hflag to alternate between the two directions of motion
+        if hflag:
+            next_row, next_col = row, col - 1
+        else:
+            next_row, next_col = row - vdir, col + 1
+        hflag = not hflag
+
+        # If the computed next position is outside the QR-code matrix, then change direction
+        if next_row < 0 or next_row >= size:
+            col -= 1
+            vdir = -vdir
+            hflag = True
+        else:
+            row, col = next_row, next_col
+
+    return np.array(positions, dtype=np.intp)
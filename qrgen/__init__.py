@@ -2,3 +2,7 @@ import logging
 from logging import NullHandler
 
 from .QRcode import QRcode as QRcode
+
+# The package does not configure logging; its log records are discarded unless the application
+# configures logging (as done by the command-line interface in __main__)
+logging.getLogger(__name__).addHandler(NullHandler())
@@ -133,4 +133,5 @@ def main() -> None:
         display_stats(stats)
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 import logging
+import os
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
 # Path to the file containing the data specifications for the QR code
-_DATASPEC_FILE = "qrgen/dataspec.txt"
+_DATASPEC_FILE = os.path.join(os.path.dirname(__file__), "dataspec.txt")
 
 
 @dataclass(frozen=True)
@@ -82,10 +83,10 @@ def spec_dict_from_file(
                 try:
                     version, EC_level, dataspec = _parse_data_spec(line)
                 except ValueError:
-                    logger.info(f"Skipping invalid line in {filename}: {line.strip()}")
+                    logger.info("Skipping invalid line in %s: %s", filename, line.strip())
                     continue
                 spec_dict[(version, EC_level)] = dataspec
     except FileNotFoundError as err:
-        logger.critical(f"Data specification file {filename} not found.")
+        logger.critical("Data specification file %s not found.", filename)
         raise OSError(f"Data specification file {filename} not found.") from err
     return spec_dict
@@ -1,8 +1,10 @@
 import logging
 from string import ascii_uppercase
 
+import numpy as np
+
 from .spec import QRspec, Encoding
-from .utils import int_to_bool_list, binary_to_int
+from .utils import BitBuffer
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +25,20 @@ _ALPHANUM_CODES = (
     _ALPHANUM_NUMBER_CODES | _ALPHANUM_LETTER_CODES | _ALPHANUM_SYMBOL_CODES
 )
 
+# The QR code specification requires alternative padding by the 8-bit
+# codewords 236 and 17.
+_PADDING = bytes((236, 17))
+
+# Lookup table of the alphanumeric codes indexed by the ASCII value of the character
+# Characters that cannot be encoded in the alphanumeric mode map to _INVALID_CODE
+# Lowercase letters map to the codes of the corresponding uppercase letters, so that
+# the message does not need to be converted to uppercase before the lookup
+_INVALID_CODE = 255
+_ALPHANUM_TABLE = np.full(128, _INVALID_CODE, dtype=np.uint8)
+for _char, _code in _ALPHANUM_CODES.items():
+    _ALPHANUM_TABLE[ord(_char)] = _code
+    _ALPHANUM_TABLE[ord(_char.lower())] = _code
+
 
 def encode(spec: QRspec, msg: str) -> list[int]:
     """Encodes the message in the specified QR code specification and data type.
@@ -30,101 +46,111 @@ def encode(spec: QRspec, msg: str) -> list[int]:
     Args:
         spec (QRspec): The QR code specification.
         msg (str): The message to encode.
-        dtype (int): The data type (0 for numeric, 1 for alphanumeric, 2 for binary).
 
     Returns:
         list[int]: The encoded message as a list of integers.
     """
 
+    data = BitBuffer()
+
+    # Header consisting of the encoding and the length of the message
+    # in the specified number of bits, written to the buffer in one go
+    # (the message length always fits, since the spec has room for the message)
+    num_msglen_bits = spec.num_msglen_bits
+    header = (spec.encoding.get_code() << num_msglen_bits) | len(msg)
+    data.append(header, 4 + num_msglen_bits)
+
     match spec.encoding:
         case Encoding.NUMERIC:
             logger.debug("Numerical encoding...")
-            encoded_msg = _qr_encode_numeric(msg)
+            _qr_encode_numeric(msg, data)
         case Encoding.ALPHANUMERIC:
-            logger.info("Converting to uppercase for alphanumeric encoding...")
-            encoded_msg = _qr_encode_alphanumeric(msg.upper())
+            logger.debug("Alphanumeric encoding...")
+            _qr_encode_alphanumeric(msg, data)
         case Encoding.BINARY:
             logger.debug("Binary encoding...")
-            encoded_msg = _qr_encode_binary(msg)
+            _qr_encode_binary(msg, data)
         case Encoding.KANJI:
             raise NotImplementedError(
                 "Kanji encoding is not implemented in this package!"
             )
 
-    encoding_header = spec.encoding.get_code()
-    msglen_header = int_to_bool_list(len(msg), spec.num_msglen_bits)
-    # Encode the length of the message in the specified number of bits
-
-    header = encoding_header + msglen_header
-
-    data = header + encoded_msg
     pad_data(data, spec.datalen_in_bits)
 
-    return [binary_to_int(data[i : i + 8]) for i in range(0, len(data), 8)]
+    return list(data.to_bytes())
 
 
-def _qr_encode_binary(msg: str) -> list[bool]:
+def _qr_encode_binary(msg: str, data: BitBuffer) -> None:
     """Encode a string in binary mode"""
-    result: list[bool] = []
-    for char in msg:
-        result.extend(int_to_bool_list(ord(char), 8))
+    # Each character is encoded as a byte, so the whole message is appended as a single integer
+    try:
+        msg_bytes = msg.encode("latin-1")
+    except UnicodeEncodeError as err:
+        raise ValueError(
+            f" {msg[err.start]} cannot be encoded in the binary mode"
+        ) from err
 
-    return result
+    data.append(int.from_bytes(msg_bytes, "big"), 8 * len(msg_bytes))
 
 
-def _qr_encode_numeric(msg: str) -> list[bool]:
-    """Encode a string in alphanumeric mode"""
-    if not msg.isdecimal():
+def _qr_encode_numeric(msg: str, data: BitBuffer) -> None:
+    """Encode a string in numeric mode"""
+    if not (msg.isascii() and msg.isdecimal()):
         raise ValueError(
             "Cannot use numeric encoding, since the message contains non-numeric characters!"
         )
 
-    result: list[bool] = []
+    # Convert all the digits at once
+    digits = np.frombuffer(msg.encode("ascii"), dtype=np.uint8) - ord("0")
+    digits = digits.astype(np.int64)
 
-    # Number of complete 2-character blocks
+    # Number of complete 3-digit blocks
     num_triplets = len(msg) // 3
-    num_remaining = len(msg) % 2
+    num_remaining = len(msg) % 3
 
     # Encode the triplets of digits in 10 bits
-    for i in range(num_triplets):
-        encoded_int = int(msg[3 * i : 3 * i + 3])
-        result.extend(int_to_bool_list(encoded_int, 10))
+    triplets = digits[: 3 * num_triplets].reshape(num_triplets, 3)
+    data.append_array(100 * triplets[:, 0] + 10 * triplets[:, 1] + triplets[:, 2], 10)
 
     # Encode the remaining digits
     # A single digit is encoded in 4 bits
     if num_remaining == 1:
-        encoded_int = int(msg[-1])
-        result.extend(int_to_bool_list(encoded_int, 4))
+        data.append(int(msg[-1]), 4)
     # A pair of digits is encoded in 7 bits
     elif num_remaining == 2:
-        encoded_int = int(msg[-2:])
-        result.extend(int_to_bool_list(encoded_int, 7))
+        data.append(int(msg[-2:]), 7)
 
-    return result
 
+def _qr_encode_alphanumeric(msg: str, data: BitBuffer) -> None:
+    """Encode a string in alphanumeric mode (lowercase letters as uppercase)"""
 
-def _qr_encode_alphanumeric(msg: str) -> list[bool]:
-    """Encode a string in alphanumeric mode"""
-    result: list[bool] = []
+    # Look up the codes of all the characters at once
+    if not msg.isascii():
+        _raise_invalid_alphanum(next(char for char in msg if not char.isascii()))
+    codes = _ALPHANUM_TABLE[np.frombuffer(msg.encode("ascii"), dtype=np.uint8)]
+    if np.any(codes == _INVALID_CODE):
+        _raise_invalid_alphanum(msg[np.argmax(codes == _INVALID_CODE)])
+    codes = codes.astype(np.int64)
 
     # Number of complete 2-character blocks
     num_pairs = len(msg) // 2
     num_remaining = len(msg) % 2
 
     # Encode the pairs of characters in 11 bits
-    for i in range(num_pairs):
-        encoded_int = 45 * alphanum_code(msg[2 * i]) + alphanum_code(msg[2 * i + 1])
-        result.extend(int_to_bool_list(encoded_int, 11))
+    pairs = codes[: 2 * num_pairs].reshape(num_pairs, 2)
+    data.append_array(45 * pairs[:, 0] + pairs[:, 1], 11)
 
     # Encode the remaining character, if any, in 6 bits
     if num_remaining == 1:
-        encoded_int = alphanum_code(msg[-1])
-        result.extend(int_to_bool_list(encoded_int, 6))
+        data.append(int(codes[-1]), 6)
+
 
-    return result
+def _raise_invalid_alphanum(char: str) -> None:
+    """Log and raise an error for a character that has no alphanumeric code."""
+    logger.error("The character %s cannot be encoded in the alphanumeric mode!", char)
+    raise ValueError(f" {char} cannot be encoded in the alphanumeric mode")
 
 
-# Function to convert a character to a number in the alphanumeric mode
 def alphanum_code(char: str) -> int:
     """Converts a character to its corresponding alphanumeric code specified by
     the QR code specification.
@@ -135,45 +161,26 @@ def alphanum_code(char: str) -> int:
     try:
         return _ALPHANUM_CODES[char]
     except KeyError:
-        logger.error(
-            f"The character {char} cannot be encoded in the alphanumeric mode!"
-        )
-        raise ValueError(f" {char} cannot be encoded in the alphanumeric mode")
+        _raise_invalid_alphanum(char)
 
 
-# Function to pad the message. Note that since the array is initialized to False,
-# padding with zeros is equivalent to simply moving the index
-def pad_data(data: list[bool], max_len: int) -> None:
+# Function to pad the message up to the maximum length allowed by the QR code specification
+def pad_data(data: BitBuffer, max_len: int) -> None:
     """Pad the data to the specified maximum length."""
 
-    # The QR code specification requires alternative padding by the 8-bit
-    # codewords 236 and 17.
-    _PADDING = [int_to_bool_list(236, 8), int_to_bool_list(17, 8)]
-
-    ind = len(data)
-    pad_len = max_len - ind
-    data.extend([False] * pad_len)
-
-    # If only up to four bits are left, then we are done
-    if pad_len <= 4:
+    pad_len = max_len - len(data)
+    if pad_len <= 0:
         return
 
-    # Add the terminator string of 4 zeros
-    ind += 4
+    # Add the terminator string of (up to) 4 zeros
+    data.append(0, min(pad_len, 4))
 
     # If the data length after this padding is not a multiple of 8,
-    # move ahead until it is.
-    rem = ind % 8
-    if rem != 0:
-        ind += 8 - rem
-
-    # Alternatively pad with the two fixed boolean arrays stored in the constant PADDING
-    # Pad with PADDING[0] if pflag is true and with PADDING[1] otherwise
-    pflag = True
-    while ind < max_len:
-        if pflag:
-            data[ind : ind + 8] = _PADDING[0]
-        else:
-            data[ind : ind + 8] = _PADDING[1]
-        pflag = not pflag
-        ind += 8
+    # pad with zeros until it is.
+    data.append(0, -len(data) & 7)
+
+    # Alternatively pad with the two fixed codewords stored in the constant _PADDING
+    # The padding bytes are obtained by repeating the pattern and appended all at once
+    num_pad_bytes = (max_len - len(data)) >> 3
+    padding = (_PADDING * (num_pad_bytes // 2 + 1))[:num_pad_bytes]
+    data.append(int.from_bytes(padding, "big"), 8 * num_pad_bytes)
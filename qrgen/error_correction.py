@@ -1,4 +1,8 @@
-from .galois import GF_mult_poly, GF_div_poly, GF_antilogs
+from functools import lru_cache
+
+import numpy as np
+
+from .galois import GF_EXP, GF_MUL, GF_div_poly
 
 
 def compute_EC_blocks(
@@ -13,12 +17,23 @@ def compute_EC_blocks(
     return EC_blocks
 
 
-def construct_EC_poly(nblocks: int) -> list[int]:
-    """Construct the error correction polynomial for the given number of blocks."""
-    poly = [1, 1]
-    for i in range(1, nblocks):
-        poly = GF_mult_poly(poly, [1, GF_antilogs[i]])
-    return poly
+@lru_cache(maxsize=None)
+def construct_EC_poly(nblocks: int) -> tuple[int, ...]:
+    """Construct the error correction polynomial for the given number of blocks.
+
+    The polynomial only depends on the number of blocks (of which there are only a handful of
+    distinct values in the QR code standard), so the result is cached and returned as a tuple.
+    """
+    # The generator polynomial is the product of the linear factors (x - a^i) for
+    # i = 0, ..., nblocks - 1. Multiplying by a linear factor shifts the polynomial by one
+    # term and adds (XORs) the polynomial scaled by a^i, which is a single table lookup.
+    poly = np.ones(1, dtype=np.uint8)
+    for alpha in GF_EXP[:nblocks]:
+        next_poly = np.zeros(len(poly) + 1, dtype=np.uint8)
+        next_poly[:-1] = poly
+        next_poly[1:] ^= GF_MUL[poly, alpha]
+        poly = next_poly
+    return tuple(poly.tolist())
 
 
 def compute_error_correction_bytes(data, EC_poly):
@@ -30,33 +45,20 @@ def compute_error_correction_bytes(data, EC_poly):
     return GF_div_poly(tmp_coeffs, EC_poly)[-len(EC_poly) :]
 
 
-def _find_next_nonzero(arr: list[bool]) -> int:
-    """Find the index of the first True element in a boolean array.
-
-    If no True element is found, return the length of the array.
-    """
-    for ind, elem in enumerate(arr):
-        if elem:
-            return ind
-    else:
-        return len(arr)
-
-
 def compute_error_correction_bits(
     msg_coeffs: list[bool], EC_coeffs: list[bool]
 ) -> list[bool]:
     """Compute the error correction bits for the given message and error correction coefficients."""
-    msg_len = len(msg_coeffs)
     ec_len = len(EC_coeffs)
-    total_len = msg_len + ec_len - 1
 
-    result = [False] * total_len
-    result[:msg_len] = msg_coeffs
+    # The polynomials over GF(2) are short enough (at most 18 bits for the version information)
+    # to be held in plain integers, with one bit per coefficient and the leading term in the
+    # most significant bit. Each division step is then a single shift and XOR.
+    EC_poly = int("".join("1" if bit else "0" for bit in EC_coeffs), 2)
+    remainder = int("".join("1" if bit else "0" for bit in msg_coeffs) or "0", 2)
+    remainder <<= ec_len - 1
 
-    start = _find_next_nonzero(result)
-    while start + ec_len <= total_len:
-        for ind in range(ec_len):
-            result[start + ind] ^= EC_coeffs[ind]
-        start = _find_next_nonzero(result)
+    while (shift := remainder.bit_length() - ec_len) >= 0:
+        remainder ^= EC_poly << shift
 
-    return list(result[-ec_len + 1 :])
+    return [bool(remainder >> ind & 1) for ind in range(ec_len - 2, -1, -1)]
@@ -5,6 +5,10 @@ algorithm in the QR code standard.
 
 """
 
+from functools import lru_cache
+
+import numpy as np
+
 # Generator for the Galois field GF(2^8). The bits in the binary representation of 285
 # are interpreted as the coefficients of the polynomial over GF(2)
 GALOIS_GEN = 285
@@ -14,27 +18,40 @@ GALOIS_GEN = 285
 # =============================================
 
 
-def gen_GF_log_tables() -> tuple[dict[int, int], dict[int, int]]:
-    """Generates the log and antilog tables for the Galois field GF(2^8)."""
-    GF_antilogs: dict[int, int] = {}
+def gen_GF_log_tables() -> tuple[np.ndarray, np.ndarray]:
+    """Generates the log and antilog tables for the Galois field GF(2^8).
 
-    num = 1
-    GF_antilogs[0] = num
+    The antilog table is extended over two periods of the multiplicative group (of order 255),
+    so that the sum of two logs can be looked up directly without reducing it modulo 255.
+    The log of zero is undefined and is stored as 0.
+    """
+    GF_log = np.zeros(256, dtype=np.uint8)
+    GF_exp = np.zeros(512, dtype=np.uint8)
 
-    for i in range(1, 255):
-        num *= 2
+    num = 1
+    for i in range(255):
+        GF_exp[i] = num
+        GF_log[num] = i
+        num <<= 1
         if num > 255:
             num ^= GALOIS_GEN  # Reduce modulo the generator polynomial
-        GF_antilogs[i] = num
 
-    # Invert the dictionary to get the logs
-    GF_logs = {val: key for key, val in GF_antilogs.items()}
+    GF_exp[255:510] = GF_exp[:255]
+    GF_exp[510:] = GF_exp[:2]
 
-    return GF_logs, GF_antilogs
+    return GF_log, GF_exp
 
 
 # Generate the log and antilog tables for the Galois field GF(2^8)
-GF_logs, GF_antilogs = gen_GF_log_tables()
+GF_LOG, GF_EXP = gen_GF_log_tables()
+
+# Multiplication table over GF(2^8), so that a product is a single lookup
+GF_MUL = GF_EXP[GF_LOG[:, None].astype(np.int32) + GF_LOG[None, :]]
+GF_MUL[0, :] = 0
+GF_MUL[:, 0] = 0
+
+for _table in (GF_LOG, GF_EXP, GF_MUL):
+    _table.setflags(write=False)
 
 
 # ARITHEMETIC OPERATIONS IN GF(2^8)
@@ -42,11 +59,8 @@ GF_logs, GF_antilogs = gen_GF_log_tables()
 
 
 def GF_mult(x: int, y: int) -> int:
-    """Multiply two values in the Galois field GF(2^8) using precomputed log tables."""
-    if x == 0 or y == 0:
-        return 0
-    else:
-        return GF_antilogs[(GF_logs[x] + GF_logs[y]) % 255]
+    """Multiply two values in the Galois field GF(2^8) by a lookup in the product table."""
+    return int(GF_MUL[x, y])
 
 
 def GF_div(x: int, y: int) -> int:
@@ -56,7 +70,7 @@ def GF_div(x: int, y: int) -> int:
     elif y == 0:
         raise ZeroDivisionError("Division by zero in Galois field GF(2^8)!")
     else:
-        return GF_antilogs[(GF_logs[x] - GF_logs[y]) % 255]
+        return int(GF_EXP[int(GF_LOG[x]) - int(GF_LOG[y]) + 255])
 
 
 def GF_mult_poly(poly1: list[int], poly2: list[int]) -> list[int]:
@@ -67,14 +81,16 @@ def GF_mult_poly(poly1: list[int], poly2: list[int]) -> list[int]:
     nterms2 = len(poly2)
     nterms = nterms1 + nterms2 - 1
 
-    # Initialize an array to store the product
-    prod = [0] * nterms
-    for i in range(nterms):
-        jmin = max(0, i - nterms2 + 1)
-        jmax = min(i, nterms1 - 1)
-        for j in range(jmin, jmax + 1):
-            prod[i] ^= GF_mult(poly1[j], poly2[i - j])
-    return prod
+    # Tabulate all pairwise products of terms, and add (XOR) each of them to the term of
+    # the product whose degree is the sum of the degrees of the two factors
+    coeffs1 = np.asarray(poly1, dtype=np.uint8)
+    coeffs2 = np.asarray(poly2, dtype=np.uint8)
+    terms = GF_MUL[coeffs1[:, None], coeffs2[None, :]]
+    degrees = np.add.outer(np.arange(nterms1), np.arange(nterms2))
+
+    prod = np.zeros(max(nterms, 0), dtype=np.uint8)
+    np.bitwise_xor.at(prod, degrees.ravel(), terms.ravel())
+    return prod.tolist()
 
 
 # TODO: Return both quotient and remainder and choose the one that is needed in the caller
@@ -91,16 +107,41 @@ def GF_div_poly(poly1: list[int], poly2: list[int]) -> list[int]:
     if nterms1 < nterms2:
         return poly1
 
-    nterms = nterms1 - nterms2
-    ptmp = poly1.copy()
-
-    # Initialize an array to store the product
-    for i in range(nterms + 1):
-        if ptmp[i] == 0:
-            continue
-
-        fact = GF_div(ptmp[i], poly2[0])
-        for j in range(nterms2):
-            ptmp[i + j] ^= GF_mult(poly2[j], fact)
+    if poly2[0] == 0:
+        raise ZeroDivisionError("Division by zero in Galois field GF(2^8)!")
 
-    return ptmp[-nterms2 + 1 :]
+    # The remainder has one term less than the divisor
+    nrem = nterms2 - 1
+    if nrem == 0:
+        return []
+
+    # The running remainder is held in a single integer with one byte per coefficient, so
+    # that subtracting a multiple of the divisor is a single XOR over all its terms
+    scaled_divisors = _scaled_divisors(tuple(poly2))
+    rem_mask = (1 << (8 * nrem)) - 1
+    lead_shift = 8 * (nrem - 1)
+
+    lead = poly1[0]
+    rem = int.from_bytes(bytes(poly1[1:nterms2]), "big")
+    for coeff in poly1[nterms2:]:
+        # Cancel the leading term, then shift the next term of the dividend into the remainder
+        rem ^= scaled_divisors[lead]
+        lead = rem >> lead_shift
+        rem = ((rem << 8) & rem_mask) | coeff
+    rem ^= scaled_divisors[lead]
+
+    return list(rem.to_bytes(nrem, "big"))
+
+
+@lru_cache(maxsize=None)
+def _scaled_divisors(divisor: tuple[int, ...]) -> list[int]:
+    """Tabulates the multiples of a divisor polynomial needed in polynomial long division.
+
+    The entry at index c contains the terms of divisor * (c / divisor[0]), excluding the leading
+    term (which equals c), packed into an integer with one byte per coefficient.
+    """
+    lead_log = int(GF_LOG[divisor[0]])
+    facts = GF_EXP[GF_LOG[1:].astype(np.int32) - lead_log + 255]
+    prods = GF_MUL[facts[:, None], np.array(divisor[1:], dtype=np.uint8)[None, :]]
+
+    return [0] + [int.from_bytes(row.tobytes(), "big") for row in prods]
@@ -1,7 +1,8 @@
 import logging
 
+import numpy as np
+
 from .spec import QRspec
-from .utils import int_to_bool_list
 
 
 logger = logging.getLogger(__name__)
@@ -52,7 +53,9 @@ def interlace_blocks(
         raise ValueError("Only expected two kinds of blocks, but got more than two!")
 
     logger.debug(
-        f"Interlacing {len(data_blocks)} data blocks and {len(EC_blocks)} error correction blocks..."
+        "Interlacing %d data blocks and %d error correction blocks...",
+        len(data_blocks),
+        len(EC_blocks),
     )
 
     # The error correction blocks are all of the same length
@@ -64,9 +67,7 @@ def interlace_blocks(
     return result
 
 
-def bits_from_blocks(data: list[int]) -> list[bool]:
-    """Converts a list of blocks (each block is a list of integers) into a flat list of bits."""
-    result = []
-    for i in data:
-        result.extend(int_to_bool_list(i, 8))
-    return result
+def bits_from_blocks(data: list[int]) -> np.ndarray:
+    """Converts a list of blocks (each block is a list of integers) into a flat array of bits."""
+    # The unpacked bits are 0 or 1, so they are reinterpreted as booleans without a copy
+    return np.unpackbits(np.array(data, dtype=np.uint8)).view(bool)
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import numpy as np
 
 """
@@ -17,82 +19,150 @@ PATTERN_LEN = 11
 
 
 # Function to generate the pattern masks for a given size
+# The masks depend only on the size, so they are cached and returned as a read-only array
+@lru_cache(maxsize=None)
 def gen_pmasks(size):
     #  Initialize a 3d array to hold all masks for a given size
-    pmasks = np.zeros((8, size, size), dtype=bool)
-
-    # Loop over all the modules in the QR-code matrix
-    for i in range(size):
-        for j in range(size):
-            pmasks[0, i, j] = (i + j) % 2 == 0
-            pmasks[1, i, j] = i % 2 == 0
-            pmasks[2, i, j] = j % 3 == 0
-            pmasks[3, i, j] = (i + j) % 3 == 0
-            pmasks[4, i, j] = (i // 2 + j // 3) % 2 == 0
-            pmasks[5, i, j] = (i * j) % 2 + (i * j) % 3 == 0
-            pmasks[6, i, j] = ((i * j) % 2 + (i * j) % 3) % 2 == 0
-            pmasks[7, i, j] = ((i + j) % 2 + (i * j) % 3) % 2 == 0
+    pmasks = np.empty((8, size, size), dtype=bool)
+
+    # Row and column indices of all the modules in the QR-code matrix (broadcast against each other)
+    i = np.arange(size)[:, np.newaxis]
+    j = np.arange(size)[np.newaxis, :]
+    ij = i * j
+
+    pmasks[0] = (i + j) % 2 == 0
+    pmasks[1] = i % 2 == 0
+    pmasks[2] = j % 3 == 0
+    pmasks[3] = (i + j) % 3 == 0
+    pmasks[4] = (i // 2 + j // 3) % 2 == 0
+    pmasks[5] = ij % 2 + ij % 3 == 0
+    pmasks[6] = (ij % 2 + ij % 3) % 2 == 0
+    pmasks[7] = ((i + j) % 2 + ij % 3) % 2 == 0
+
+    pmasks.setflags(write=False)
     return pmasks
 
 
 # Function to evaluate the total penalty for a given QR matrix
-def eval_qrmat(mat, len):
+# The evaluation stops as soon as the penalty reaches the cutoff (if provided), in which
+# case the partial penalty (which is a lower bound on the total penalty) is returned
+def eval_qrmat(mat, len, cutoff=float("inf")):
+    return eval_bitboards(pack_bitboard(mat), pack_bitboard(mat.T), len, cutoff)
+
+
+# Function to evaluate the total penalty for a QR matrix given as a pair of bitboards,
+# i.e., the matrix and its transpose packed into integers (see pack_bitboard)
+# All the checks act on all the modules at once through shifts of the bitboards
+def eval_bitboards(bitboard, bitboard_T, len, cutoff=float("inf")):
     # Initialize the penalty to zero
     penalty = 0
 
     # Check for runs of more than five consecutive dark/light modules
-    for i in range(0, len):
-        hrun = 0
-        vrun = 0
-        for j in range(1, len):
-            # Check for horizontal runs
-            if mat[i, j] == mat[i, j - 1]:
-                hrun += 1
-            else:
-                if hrun >= 5:
-                    penalty += RUN_FACTOR + hrun - 5
-                hrun = 0
-
-            # Check for vertical runs
-            if mat[j, i] == mat[j - 1, i]:
-                vrun += 1
-            else:
-                if vrun >= 5:
-                    penalty += RUN_FACTOR + vrun - 5
-                vrun = 0
+    # The vertical runs (along the columns) are the horizontal runs of the transpose
+    penalty += _run_penalty(bitboard, len)
+    penalty += _run_penalty(bitboard_T, len)
 
     # Check for 2x2 blocks of dark/light modules
-    for i in range(1, len):
-        for j in range(1, len):
-            # Check for horizontal blocks
-            if mat[i, j] == mat[i - 1, j - 1] == mat[i - 1, j] == mat[i, j - 1]:
-                penalty += BLOCK_FACTOR
-
-    # Check for patterns of dark/light modules resembling the corners
-    for i in range(0, len):
-        for j in range(0, len - PATTERN_LEN):
-            penalty += CORNER_FACTOR * count_matches(
-                mat[i, j : j + PATTERN_LEN], CORNER_PATTERN
-            )
-            penalty += CORNER_FACTOR * count_matches(
-                mat[j : j + PATTERN_LEN, i], CORNER_PATTERN
-            )
+    # A block is identified by its bottom-right module, which must agree with the module to
+    # its left (shift by 1), the one above it (shift by len) and the one diagonally above it
+    mismatch = (
+        (bitboard ^ (bitboard >> 1))
+        | (bitboard ^ (bitboard >> len))
+        | (bitboard ^ (bitboard >> (len + 1)))
+    )
+    penalty += BLOCK_FACTOR * (_block_corners(len) & ~mismatch).bit_count()
 
     # Check for deviation from a 50-50 distribution of dark modules
-    darkmod_count = np.sum(mat)
-    darkmod_frac = darkmod_count / (len * len)
-    penalty += np.uint16(np.floor(abs(darkmod_frac - 0.5))) * HOM_FACTOR
+    # Each deviation of 5% in the percentage of dark modules is penalized by HOM_FACTOR,
+    # i.e., the penalty is HOM_FACTOR * floor(|100 * frac - 50| / 5), computed in integers
+    darkmod_count = bitboard.bit_count()
+    num_modules = len * len
+    penalty += HOM_FACTOR * (abs(20 * darkmod_count - 10 * num_modules) // num_modules)
+
+    if penalty >= cutoff:
+        return penalty
+
+    # Check for patterns of dark/light modules resembling the corners
+    # along the rows and along the columns (i.e., the rows of the transpose)
+    penalty += _corner_penalty(bitboard, len)
+    penalty += _corner_penalty(bitboard_T, len)
 
     return penalty
 
 
-# Function to count the number of times the string "pattern" appears in the vector "vec"
-# This includes overlaps and forward as well as backward matches
-def count_matches(vec, pattern):
-    count = 0
-    for i in range(len(vec) - len(pattern) + 1):
-        if np.all(vec[i : i + len(pattern)] == pattern):
-            count += 1
-        if np.all(vec[i : i + len(pattern)] == pattern[::-1]):
-            count += 1
-    return count
+def _corner_penalty(bitboard: int, size: int) -> int:
+    """Compute the penalty for patterns resembling the corners along the rows of a packed matrix.
+
+    A window of PATTERN_LEN modules, identified by its first module, matches the pattern if each
+    of its modules agrees with the corresponding bit of the pattern. Shifting the bitboard left
+    by k moves the value of each module k positions backward, so the matches of all windows are
+    found together by combining the shifted bitboards for each bit of the pattern.
+    Both the pattern and its reverse are checked.
+    """
+    num_matches = 0
+    for pattern in (CORNER_PATTERN, CORNER_PATTERN[::-1]):
+        matches = _row_prefix(size, PATTERN_LEN - 1)
+        for k, bit in enumerate(pattern):
+            shifted = bitboard << k
+            matches &= shifted if bit else ~shifted
+        num_matches += matches.bit_count()
+
+    return CORNER_FACTOR * num_matches
+
+
+def _run_penalty(bitboard: int, size: int) -> int:
+    """Compute the penalty for runs of identical modules along the rows of a packed matrix.
+
+    A run of length L >= 6 is penalized by RUN_FACTOR + L - 6. Runs that extend to
+    the end of a row are not penalized.
+
+    Such a run contains L - 5 windows of 6 identical modules, so its penalty is the number
+    of these windows plus RUN_FACTOR - 1 for the first one (the start of the run).
+    """
+    # Modules that agree with the next module in the same row
+    same = ~(bitboard ^ (bitboard << 1)) & _row_prefix(size, 1)
+
+    # First modules of the windows of 6 identical modules, and of the runs that they start
+    windows = same
+    for k in range(1, 5):
+        windows &= same << k
+    run_starts = windows & ~(same >> 1)
+
+    # Exclude the runs extending to the end of the row, i.e., keep only the modules followed
+    # by a change later in the same row. This is found by spreading each change backwards
+    # along the row over 1, 2, 4, ... modules.
+    changes = _row_prefix(size, 1) & ~same
+    shift = 1
+    while shift < size:
+        changes |= (changes << shift) & _row_prefix(size, shift)
+        shift *= 2
+
+    num_windows = (windows & changes).bit_count()
+    num_runs = (run_starts & changes).bit_count()
+    return num_windows + (RUN_FACTOR - 1) * num_runs
+
+
+def pack_bitboard(mat: np.ndarray) -> int:
+    """Pack a boolean matrix into an integer in row-major order.
+
+    The first module of the matrix is stored in the most significant bit, so that shifting
+    the integer right by k moves the value of each module k positions forward.
+    """
+    return int.from_bytes(np.packbits(mat).tobytes(), "big")
+
+
+@lru_cache(maxsize=None)
+def _row_prefix(size: int, num_excluded: int) -> int:
+    """Returns the bitboard of the modules that are not among the last num_excluded of their row."""
+    prefix = np.zeros((size, size), dtype=bool)
+    prefix[:, : size - num_excluded] = True
+    return pack_bitboard(prefix)
+
+
+@lru_cache(maxsize=None)
+def _block_corners(size: int) -> int:
+    """Returns the bitboard of the modules that can be the bottom-right corner of a 2x2 block."""
+    corners = np.ones((size, size), dtype=bool)
+    corners[0, :] = False
+    corners[:, 0] = False
+    return pack_bitboard(corners)
@@ -1,5 +1,8 @@
 import logging
 from enum import IntEnum, unique
+from functools import lru_cache
+
+import numpy as np
 
 from .dataspec import DataSpec, spec_dict_from_file
 from .error_correction import compute_error_correction_bits
@@ -26,11 +29,9 @@ class Encoding(IntEnum):
     BINARY = 2
     KANJI = 3
 
-    def get_code(self) -> list[bool]:
-        """Returns the encoding code as a list of boolean values."""
-        code = [False] * 4
-        code[-self.value - 1] = True
-        return code
+    def get_code(self) -> int:
+        """Returns the 4-bit code (mode indicator) of the encoding."""
+        return 1 << self.value
 
 
 @unique
@@ -43,6 +44,39 @@ class ErrorCorrectionLevel(IntEnum):
     H = 2
 
 
+# Number of bits used to encode the length of the message for each encoding,
+# for versions 1-9, 10-26, and 27-40, respectively
+_MSGLEN_BITS: dict[Encoding, tuple[int, int, int]] = {
+    Encoding.NUMERIC: (10, 12, 14),
+    Encoding.ALPHANUMERIC: (9, 11, 13),
+    Encoding.BINARY: (8, 16, 16),
+}
+
+
+def _format_bits(EC_level: ErrorCorrectionLevel, mask_num: int) -> list[bool]:
+    """Compute the format information bits for an error correction level and pattern mask."""
+    EC_list = int_to_bool_list(EC_level.value, 2)
+    masknum_list = int_to_bool_list(mask_num, 3)
+    result = EC_list + masknum_list
+    result += compute_error_correction_bits(result, FORMAT_POLYNOMIAL)
+    for ind, bit in enumerate(FORMAT_MASK):
+        result[ind] ^= bit
+    return result
+
+
+# The format information depends only on the error correction level and the pattern mask,
+# so all 4 x 8 possible format strips are computed once, indexed by the value of the
+# error correction level and the mask number.
+_FORMAT_TABLE: np.ndarray = np.array(
+    [
+        [_format_bits(level, mask_num) for mask_num in range(8)]
+        for level in sorted(ErrorCorrectionLevel)
+    ],
+    dtype=bool,
+)
+_FORMAT_TABLE.setflags(write=False)
+
+
 class QRspec:
     """Class to hold the specifications for a QR code."""
 
@@ -122,28 +156,13 @@ class QRspec:
 
     @property
     def num_msglen_bits(self) -> int:
-        match self._encoding:
-            case Encoding.NUMERIC:
-                if self._version <= 9:
-                    return 10
-                elif self._version <= 26:
-                    return 12
-                else:
-                    return 14
-            case Encoding.ALPHANUMERIC:
-                if self._version <= 9:
-                    return 9
-                elif self._version <= 26:
-                    return 11
-                else:
-                    return 13
-            case Encoding.BINARY:
-                if self._version <= 9:
-                    return 8
-                else:
-                    return 16
-            case Encoding.KANJI:
-                raise NotImplementedError("Kanji encoding not implemented!")
+        """Returns the number of bits used to encode the length of the message."""
+        if self._encoding not in _MSGLEN_BITS:
+            raise NotImplementedError("Kanji encoding not implemented!")
+
+        # Index 0, 1, or 2 for versions 1-9, 10-26, or 27-40, respectively
+        version_range = (self._version >= 10) + (self._version >= 27)
+        return _MSGLEN_BITS[self._encoding][version_range]
 
     def version_to_bool_array(self, encoding_len: int = CORNER_SIZE - 1) -> list[bool]:
         """Returns a boolean array encoding the version with error correction bits."""
@@ -151,15 +170,9 @@ class QRspec:
         result += compute_error_correction_bits(result, VERSION_POLYNOMIAL)
         return result
 
-    def format_to_bool_array(self, mask_num: int) -> list[bool]:
-        """Returns a boolean array encoding the error correction level and pattern mask."""
-        EC_list = int_to_bool_list(self._EC_level.value, 2)
-        masknum_list = int_to_bool_list(mask_num, 3)
-        result = EC_list + masknum_list
-        result += compute_error_correction_bits(result, FORMAT_POLYNOMIAL)
-        for ind, bit in enumerate(FORMAT_MASK):
-            result[ind] ^= bit
-        return result
+    def format_to_bool_array(self, mask_num: int) -> np.ndarray:
+        """Returns a (read-only) boolean array encoding the error correction level and pattern mask."""
+        return _FORMAT_TABLE[self._EC_level, mask_num]
 
 
 def _compute_encoded_len(msglen: int, encoding: Encoding) -> int:
@@ -182,18 +195,43 @@ def _compute_encoded_len(msglen: int, encoding: Encoding) -> int:
     return msg_bits
 
 
+@lru_cache(maxsize=1)
+def _load_specs() -> tuple[dict[tuple[int, int], DataSpec], np.ndarray]:
+    """Load the data specifications from file (only once).
+
+    Returns the dictionary of data specifications, keyed by the version and error correction level,
+    together with an array of the data capacities in bits, indexed by the error correction level and
+    the version - 1.
+    """
+    spec_dict = spec_dict_from_file()
+    max_version = max(version for version, _ in spec_dict)
+
+    capacity = np.zeros((len(ErrorCorrectionLevel), max_version), dtype=np.int32)
+    for (version, EC_level), dataspec in spec_dict.items():
+        capacity[EC_level, version - 1] = dataspec.datalen_in_bits
+    capacity.setflags(write=False)
+
+    return spec_dict, capacity
+
+
+@lru_cache(maxsize=1024)
 def get_spec(
     message_len: int, version: int | None, EC_level: str, encoding: str
 ) -> QRspec:
-    """Returns the QR code specification for the given message length, version, error correction level, and encoding type."""
+    """Returns the QR code specification for the given message length, version, error correction level, and encoding type.
+
+    The specification depends only on the arguments, so the result is cached (QRspec objects are
+    never modified, and are shared between all QR codes with the same arguments). Note that the
+    log messages are only emitted when the specification is first computed.
+    """
 
     try:
-        spec_dict: dict[tuple[int, int], DataSpec] = spec_dict_from_file()
+        spec_dict, capacity = _load_specs()
     except FileNotFoundError as err:
         logger.exception(err)
         raise OSError(" error loading the QR code specifications ") from err
 
-    max_version = max(spec_dict.keys(), key=lambda x: x[0])[0]
+    max_version = capacity.shape[1]
 
     # Get the Encoding enum from the provided encoding string
     try:
@@ -222,23 +260,24 @@ def get_spec(
             "No version provided. The smallest suitable version will be used."
         )
 
-        for version in range(1, max_version + 1):
-            if (version, EC_level_) in spec_dict:
-                dataspec_ = spec_dict[(version, EC_level_)]
-                if dataspec_.datalen_in_bits >= max_datalen:
-                    version_ = version
-                    logger.info(f"Using version {version_} to encode the message. ")
-                    break
+        # The capacity grows with the version, so the smallest suitable version
+        # is found by a binary search in the row of the given error correction level
+        ind = int(np.searchsorted(capacity[EC_level_], max_datalen))
+        if ind < max_version:
+            version_ = ind + 1
+            dataspec_ = spec_dict[(version_, EC_level_)]
+            logger.info("Using version %d to encode the message. ", version_)
         else:
             # If no suitable version is found, try with the lowest error correction level and the highest version
             logger.warning(
-                f"Cannot encode the message at error correction level {EC_level_}."
-                "Trying to encode with the lowest error correction level (L)."
+                "Cannot encode the message at error correction level %s."
+                "Trying to encode with the lowest error correction level (L).",
+                EC_level_,
             )
             dataspec_ = spec_dict[(max_version, ErrorCorrectionLevel.L)]
             if dataspec_.datalen_in_bits >= max_datalen:
                 version_ = max_version
-                logger.info(f"Using version {version_} to encode the message. ")
+                logger.info("Using version %d to encode the message. ", version_)
             else:
                 raise ValueError(" cannot encode the message for any version1.")
     elif 1 <= version <= max_version:
@@ -256,9 +295,12 @@ def get_spec(
         )
 
     logger.debug(
-        f"Using {encoding_.name.lower()} encoding at version {version_} with error correction level {EC_level_.name} "
+        "Using %s encoding at version %d with error correction level %s ",
+        encoding_.name.lower(),
+        version_,
+        EC_level_.name,
     )
-    logger.debug(f"Data specification: {dataspec_}")
+    logger.debug("Data specification: %s", dataspec_)
     return QRspec(
         version=version_,
         EC_level=EC_level_,
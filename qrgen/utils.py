@@ -5,6 +5,56 @@ This module contains general utility functions used in the QR code encoding and
 """
 
 
+class BitBuffer:
+    """Append-only sequence of bits, stored packed into bytes (most significant bit first)."""
+
+    def __init__(self) -> None:
+        self._bytes = bytearray()
+        self._nbits = 0
+
+    def __len__(self) -> int:
+        return self._nbits
+
+    def append(self, value: int, nbits: int) -> None:
+        """Append a non-negative integer to the buffer as a sequence of nbits bits."""
+        if value < 0 or value >> nbits:
+            raise ValueError(f"Cannot encode {value} in {nbits} bits!")
+
+        start = self._nbits
+        self._nbits = start + nbits
+
+        # If the last byte is only partially filled, it is removed from the buffer and its
+        # bits (the high bits of the byte) are prepended to the value
+        num_partial = start & 7
+        if num_partial:
+            value |= (self._bytes.pop() >> (8 - num_partial)) << nbits
+            nbits += num_partial
+
+        # Align the value with the end of the last byte and append all of its bytes at once
+        num_bytes = (nbits + 7) >> 3
+        value <<= (num_bytes << 3) - nbits
+        self._bytes += value.to_bytes(num_bytes, "big")
+
+    def append_array(self, values: np.ndarray, nbits: int) -> None:
+        """Append an array of non-negative integers to the buffer, each as nbits bits."""
+        if len(values) == 0:
+            return
+        if values.min() < 0 or values.max() >> nbits:
+            raise ValueError(f"Cannot encode all of {values} in {nbits} bits!")
+
+        # Unpack the bits of all the values (most significant bit first) and pack them into
+        # bytes, which gives a single integer (up to the zero padding of the last byte)
+        bits = (values[:, np.newaxis] >> np.arange(nbits - 1, -1, -1)) & 1
+        packed = np.packbits(bits.astype(np.uint8))
+        total_bits = nbits * len(values)
+        value = int.from_bytes(packed.tobytes(), "big") >> (-total_bits & 7)
+        self.append(value, total_bits)
+
+    def to_bytes(self) -> bytes:
+        """Returns the contents of the buffer as bytes (the last byte is padded with zeros)."""
+        return bytes(self._bytes)
+
+
 def str_to_bool_list(bool_str: str, str_len: int | None = None) -> list[bool]:
     """Convert a boolean string to a boolean array of length ndigits, representing its binary form.
 
@@ -42,23 +92,28 @@ def int_to_bool_list(num: int, ndigits: int) -> list[bool]:
     Returns:
         list[bool]: A boolean array of length ndigits, where True represents 1 and False represents 0.
     """
+    if num < 0 or num >> ndigits:
+        raise ValueError(f" cannot encode {num} in {ndigits} bits")
 
-    return str_to_bool_list(bin(num)[2:], ndigits)
+    # Unpack the bytes of the number (most significant bit first), keeping the last ndigits
+    num_bytes = (ndigits + 7) >> 3
+    bits = np.unpackbits(np.frombuffer(num.to_bytes(num_bytes, "big"), dtype=np.uint8))
+    return bits[len(bits) - ndigits :].astype(bool).tolist()
 
 
 # Function to convert a uint8 array of 0's and 1's to a positive integer
+# The bits are packed into bytes, which are read as a single integer (most significant bit first)
+# and shifted right to drop the zeros that pad the last byte
 def binary_to_int(bin_arr):
-    num = 0
-    for i in range(len(bin_arr)):
-        num *= 2
-        num += bin_arr[i]
-    return num
+    packed = np.packbits(np.asarray(bin_arr, dtype=np.uint8))
+    return int.from_bytes(packed.tobytes(), "big") >> (-len(bin_arr) & 7)
 
 
 # Function to convert a positive integer to an array of 0's and 1's of length len
+# The bytes of the integer (most significant bit first) are unpacked into bits, of which
+# the last nbits are kept (any higher bits of the integer are dropped)
 def int_to_binary(num, nbits):
-    bin_arr = np.zeros(nbits, dtype=np.uint8)
-    for i in range(nbits):
-        bin_arr[-i - 1] = num % 2
-        num = num // 2
-    return bin_arr
+    num_bytes = (nbits + 7) >> 3
+    num = int(num) & ((1 << nbits) - 1)
+    bits = np.unpackbits(np.frombuffer(num.to_bytes(num_bytes, "big"), dtype=np.uint8))
+    return bits[len(bits) - nbits :]